@@ -50,9 +50,8 @@ class HawkAuthority:
                               .format(ours=mac, theirs=parsed_header['mac']))
 
         if check_hash:
-            p_hash = calculate_payload_hash(resource.content,
-                                            resource.credentials['algorithm'],
-                                            resource.content_type)
+            # This is the hash of our content that was just used in the MAC.
+            p_hash = content_hash
             if not strings_match(p_hash, their_hash):
                 # The hash declared in the header is incorrect.
                 # Content could have been tampered with.
@@ -96,43 +95,40 @@ class HawkAuthority:
             # exclude a bunch of keys.
             keys = ('id', 'ts', 'nonce', 'ext', 'app', 'dlg')
 
-        header = u'Hawk mac="{mac}"'.format(mac=prepare_header_val(mac))
+        attrs = [('mac', mac)]
 
         if resource.content_hash:
-            header = u'{header}, hash="{hash}"'.format(
-                header=header,
-                hash=prepare_header_val(resource.content_hash))
+            attrs.append(('hash', resource.content_hash))
 
         if 'id' in keys:
-            header = u'{header}, id="{id}"'.format(
-                header=header,
-                id=prepare_header_val(resource.credentials['id']))
+            attrs.append(('id', resource.credentials['id']))
 
         if 'ts' in keys:
-            header = u'{header}, ts="{ts}"'.format(
-                header=header, ts=prepare_header_val(resource.timestamp))
+            attrs.append(('ts', resource.timestamp))
 
         if 'nonce' in keys:
-            header = u'{header}, nonce="{nonce}"'.format(
-                header=header, nonce=prepare_header_val(resource.nonce))
+            attrs.append(('nonce', resource.nonce))
 
         # These are optional so we need to check if they have values first.
 
         if 'ext' in keys and resource.ext:
-            header = u'{header}, ext="{ext}"'.format(
-                header=header, ext=prepare_header_val(resource.ext))
+            attrs.append(('ext', resource.ext))
 
         if 'app' in keys and resource.app:
-            header = u'{header}, app="{app}"'.format(
-                header=header, app=prepare_header_val(resource.app))
+            attrs.append(('app', resource.app))
 
         if 'dlg' in keys and resource.dlg:
-            header = u'{header}, dlg="{dlg}"'.format(
-                header=header, dlg=prepare_header_val(resource.dlg))
+            attrs.append(('dlg', resource.dlg))
 
-        log.debug('Hawk header for URL={url} method={method}: {header}'
-                  .format(url=resource.url, method=resource.method,
-                          header=header))
+        # Join everything once instead of re-formatting a growing string.
+        header = u'Hawk ' + u', '.join(
+            [u'%s="%s"' % (name, prepare_header_val(val))
+             for name, val in attrs])
+
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('Hawk header for URL={url} method={method}: {header}'
+                      .format(url=resource.url, method=resource.method,
+                              header=header))
         return header
 
 
@@ -163,9 +159,15 @@ class Resource:
         self.url = kw.pop('url')
         if not self.url:
             raise ValueError('url was empty')
-        url_parts = self.parse_url(self.url)
-        log.debug('parsed URL parts: \n{parts}'
-                  .format(parts=pprint.pformat(url_parts)))
+        # Responses are for the same URL as their request so they can pass
+        # along the already parsed parts.
+        url_parts = kw.pop('url_parts', None)
+        if url_parts is None:
+            url_parts = self.parse_url(self.url)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug('parsed URL parts: \n{parts}'
+                          .format(parts=pprint.pformat(url_parts)))
+        self.url_parts = url_parts
 
         self.name = url_parts['resource'] or ''
         self.host = url_parts['hostname'] or ''
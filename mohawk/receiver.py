@@ -77,7 +77,9 @@ class Receiver(HawkAuthority):
         self.credentials_map = credentials_map
         self.seen_nonce = seen_nonce
 
-        log.debug('accepting request {header}'.format(header=request_header))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('accepting request {header}'
+                      .format(header=request_header))
 
         parsed_header = parse_authorization_header(request_header)
 
@@ -149,6 +151,7 @@ class Receiver(HawkAuthority):
         log.debug('generating response header')
 
         resource = Resource(url=self.resource.url,
+                            url_parts=self.resource.url_parts,
                             credentials=self.resource.credentials,
                             ext=ext,
                             app=self.parsed_header.get('app', None),
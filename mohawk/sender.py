@@ -141,8 +141,9 @@ class Sender(HawkAuthority):
 
         .. _`Hawk`: https://github.com/hueniverse/hawk
         """
-        log.debug('accepting response {header}'
-                  .format(header=response_header))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('accepting response {header}'
+                      .format(header=response_header))
 
         parsed_header = parse_authorization_header(response_header)
 
@@ -155,6 +156,7 @@ class Sender(HawkAuthority):
                             timestamp=self.req_resource.timestamp,
                             nonce=self.req_resource.nonce,
                             url=self.req_resource.url,
+                            url_parts=self.req_resource.url_parts,
                             method=self.req_resource.method,
                             app=self.req_resource.app,
                             dlg=self.req_resource.dlg,
@@ -1,10 +1,16 @@
+from contextlib import contextmanager
+import itertools
 import sys
-from unittest import TestCase
 
-import mock
-from nose.tools import eq_, raises
+import pytest
 
-from . import Receiver, Sender
+if sys.version_info < (2, 7):
+    # For assertRaises() as a context manager.
+    from unittest2 import TestCase
+else:
+    from unittest import TestCase
+
+from . import base, Receiver, Sender
 from .exc import (AlreadyProcessed,
                   BadHeaderValue,
                   CredentialsLookupError,
@@ -17,79 +23,151 @@ from .util import (parse_authorization_header,
                    validate_credentials)
 
 
+_CREDENTIALS = {
+    'id': 'my-hawk-id',
+    'key': 'my hAwK sekret',
+    'algorithm': 'sha256',
+}
+
+# Hawk ID -> credentials. Base.setUp() registers each test's own copy.
+_CRED_BY_ID = {_CREDENTIALS['id']: _CREDENTIALS}
+
+
+def _credentials_map(id):
+    # Pretend this is doing something more interesting like looking up
+    # a credentials by ID in a database.
+    credentials = _CRED_BY_ID.get(id)
+    if credentials is None:
+        raise LookupError('No credentialsuration for Hawk ID {id}'
+                          .format(id=id))
+    return credentials
+
+
+@contextmanager
+def _patch_base(name, value):
+    # Replace an attribute of mohawk.base for the duration of the block.
+    saved = getattr(base, name)
+    setattr(base, name, value)
+    try:
+        yield
+    finally:
+        setattr(base, name, saved)
+
+
+def _patch_utc_now(value):
+    # Make mohawk.base think the current time is value.
+    return _patch_base('utc_now', lambda *args, **kw: value)
+
+
+def _forbid_payload_hashing():
+    def calculate_payload_hash(*args, **kw):
+        raise AssertionError('Unexpectedly calculated a payload hash')
+    return _patch_base('calculate_payload_hash', calculate_payload_hash)
+
+
+def _seen_nonce(nonce, ts):
+    return False
+
+
+# The baseline header is shared across tests so its timestamp is pinned.
+# Tests that get past the MAC check must patch utc_now() to this value.
+_BASELINE_TS = 1400000000
+
+
+def _baseline_request_header():
+    return Sender(_CREDENTIALS, TestSender.url, 'GET',
+                  nonce='baseline', content='', content_type='',
+                  _timestamp=_BASELINE_TS).request_header
+
+
+def _receive(request_header, url, method='GET', **kw):
+    # Receives a request with the defaults that most tests want.
+    credentials_map = kw.pop('credentials_map', _credentials_map)
+    kw.setdefault('content', '')
+    kw.setdefault('content_type', '')
+    kw.setdefault('seen_nonce', _seen_nonce)
+    return Receiver(credentials_map, request_header, url, method, **kw)
+
+
+def _request(url='http://site.com/', method='GET', **sender_kw):
+    # Sends a request and receives it, returning (sender, receiver).
+    # The nonce is fixed so that only what the caller passes in varies.
+    sender_kw.setdefault('nonce', 'fixed')
+    sender_kw.setdefault('content', '')
+    sender_kw.setdefault('content_type', '')
+    sender = Sender(_CREDENTIALS, url, method, **sender_kw)
+    return sender, _receive(sender.request_header, url, method)
+
+
 class Base(TestCase):
 
-    def setUp(self):
-        self.credentials = {
-            'id': 'my-hawk-id',
-            'key': 'my hAwK sekret',
-            'algorithm': 'sha256',
-        }
+    # Broken or mismatched variations of _CREDENTIALS.
+    _CRED_NO_ID = {'key': 'my hAwK sekret', 'algorithm': 'sha256'}
+    _CRED_NO_KEY = {'id': 'my-hawk-id', 'algorithm': 'sha256'}
+    _CRED_NO_ALGO = {'id': 'my-hawk-id', 'key': 'my hAwK sekret'}
+    _CRED_BAD_SECRET = dict(_CREDENTIALS, key='INCORRECT; YOU FAIL')
+    _CRED_SHA512 = dict(_CREDENTIALS, algorithm='sha512')
+    _CRED_UNKNOWN_ID = dict(_CREDENTIALS, id='someone-else')
 
-        # This callable might be replaced by tests.
-        def seen_nonce(nonce, ts):
-            return False
-        self.seen_nonce = seen_nonce
+    def setUp(self):
+        self.credentials = _CREDENTIALS.copy()
+        _CRED_BY_ID[self.credentials['id']] = self.credentials
 
-    def credentials_map(self, id):
-        # Pretend this is doing something more interesting like looking up
-        # a credentials by ID in a database.
-        if self.credentials['id'] != id:
-            raise LookupError('No credentialsuration for Hawk ID {id}'
-                              .format(id=id))
-        return self.credentials
+        # Tests don't need random nonces, just unique ones.
+        self._nonce_iter = itertools.count()
 
 
 class TestConfig(Base):
 
-    @raises(InvalidCredentials)
     def test_no_id(self):
-        c = self.credentials.copy()
-        del c['id']
-        validate_credentials(c)
+        with self.assertRaises(InvalidCredentials):
+            validate_credentials(self._CRED_NO_ID)
 
-    @raises(InvalidCredentials)
     def test_no_key(self):
-        c = self.credentials.copy()
-        del c['key']
-        validate_credentials(c)
+        with self.assertRaises(InvalidCredentials):
+            validate_credentials(self._CRED_NO_KEY)
 
-    @raises(InvalidCredentials)
     def test_no_algo(self):
+        with self.assertRaises(InvalidCredentials):
+            validate_credentials(self._CRED_NO_ALGO)
+
+    def test_revalidate_changed_credentials(self):
         c = self.credentials.copy()
-        del c['algorithm']
         validate_credentials(c)
+        del c['key']
+        with self.assertRaises(InvalidCredentials):
+            validate_credentials(c)
 
-    @raises(InvalidCredentials)
     def test_no_credentials(self):
-        validate_credentials(None)
+        with self.assertRaises(InvalidCredentials):
+            validate_credentials(None)
 
 
 class TestSender(Base):
 
-    def setUp(self):
-        super(TestSender, self).setUp()
-        self.url = 'http://site.com/foo?bar=1'
+    url = 'http://site.com/foo?bar=1'
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestSender, cls).setUpClass()
+        # Tests that only tamper with what the receiver sees can all
+        # share this request header.
+        cls._baseline_header = _baseline_request_header()
 
     def Sender(self, method='GET', **kw):
         credentials = kw.pop('credentials', self.credentials)
+        kw.setdefault('nonce', 'n%d' % next(self._nonce_iter))
         kw.setdefault('content', '')
         kw.setdefault('content_type', '')
         sender = Sender(credentials, self.url, method, **kw)
         return sender
 
     def receive(self, request_header, url=None, method='GET', **kw):
-        credentials_map = kw.pop('credentials_map', self.credentials_map)
-        kw.setdefault('content', '')
-        kw.setdefault('content_type', '')
-        kw.setdefault('seen_nonce', self.seen_nonce)
-        return Receiver(credentials_map, request_header,
-                        url or self.url, method, **kw)
+        return _receive(request_header, url or self.url, method, **kw)
 
     def test_get_ok(self):
-        method = 'GET'
-        sn = self.Sender(method=method)
-        self.receive(sn.request_header, method=method)
+        with _patch_utc_now(_BASELINE_TS):
+            self.receive(self._baseline_header, method='GET')
 
     def test_post_ok(self):
         method = 'POST'
@@ -120,87 +198,43 @@ class TestSender(Base):
         self.receive(sn.request_header, method=method, content=content,
                      content_type='application/json; charset=other')
 
-    @raises(ValueError)
     def test_missing_payload_details(self):
-        self.Sender(method='POST', content=None, content_type=None)
+        with self.assertRaises(ValueError):
+            self.Sender(method='POST', content=None, content_type=None)
 
     def test_skip_payload_hashing(self):
         method = 'POST'
         content = '{"bar": "foobs"}'
         content_type = 'application/json'
-        sn = self.Sender(method=method, content=None, content_type=None,
-                         always_hash_content=False)
-        self.receive(sn.request_header, method=method, content=content,
-                     content_type=content_type,
-                     accept_untrusted_content=True)
+        with _forbid_payload_hashing():
+            sn = self.Sender(method=method, content=None, content_type=None,
+                             always_hash_content=False)
+            self.receive(sn.request_header, method=method, content=content,
+                         content_type=content_type,
+                         accept_untrusted_content=True)
 
-    @raises(ValueError)
     def test_cannot_skip_content_only(self):
-        self.Sender(method='POST', content=None,
-                    content_type='application/json')
+        with self.assertRaises(ValueError):
+            self.Sender(method='POST', content=None,
+                        content_type='application/json')
 
-    @raises(ValueError)
     def test_cannot_skip_content_type_only(self):
-        self.Sender(method='POST', content='{"foo": "bar"}',
-                    content_type=None)
-
-    @raises(MacMismatch)
-    def test_tamper_with_host(self):
-        sn = self.Sender()
-        self.receive(sn.request_header, url='http://TAMPERED-WITH.com')
-
-    @raises(MacMismatch)
-    def test_tamper_with_method(self):
-        sn = self.Sender(method='GET')
-        self.receive(sn.request_header, method='POST')
-
-    @raises(MacMismatch)
-    def test_tamper_with_path(self):
-        sn = self.Sender()
-        self.receive(sn.request_header,
-                     url='http://site.com/TAMPERED?bar=1')
-
-    @raises(MacMismatch)
-    def test_tamper_with_query(self):
-        sn = self.Sender()
-        self.receive(sn.request_header,
-                     url='http://site.com/foo?bar=TAMPERED')
-
-    @raises(MacMismatch)
-    def test_tamper_with_scheme(self):
-        sn = self.Sender()
-        self.receive(sn.request_header, url='https://site.com/foo?bar=1')
-
-    @raises(MacMismatch)
-    def test_tamper_with_port(self):
-        sn = self.Sender()
-        self.receive(sn.request_header,
-                     url='http://site.com:8000/foo?bar=1')
-
-    @raises(MacMismatch)
-    def test_tamper_with_content(self):
-        sn = self.Sender()
-        self.receive(sn.request_header, content='stuff=nope')
+        with self.assertRaises(ValueError):
+            self.Sender(method='POST', content='{"foo": "bar"}',
+                        content_type=None)
 
     def test_non_ascii_content(self):
         content = u'Ivan Kristi\u0107'
         sn = self.Sender(content=content)
         self.receive(sn.request_header, content=content)
 
-    @raises(MacMismatch)
-    def test_tamper_with_content_type(self):
-        sn = self.Sender(method='POST')
-        self.receive(sn.request_header, content_type='application/json')
-
-    @raises(AlreadyProcessed)
     def test_nonce_fail(self):
 
         def seen_nonce(nonce, ts):
             return True
 
-        sn = self.Sender()
-
-        self.receive(sn.request_header, seen_nonce=seen_nonce)
+        with self.assertRaises(AlreadyProcessed):
+            self.receive(self._baseline_header, seen_nonce=seen_nonce)
 
     def test_nonce_ok(self):
 
@@ -210,11 +244,11 @@ class TestSender(Base):
         sn = self.Sender(seen_nonce=seen_nonce)
         self.receive(sn.request_header)
 
-    @raises(TokenExpired)
     def test_expired_ts(self):
         now = utc_now() - 120
         sn = self.Sender(_timestamp=now)
-        self.receive(sn.request_header)
+        with self.assertRaises(TokenExpired):
+            self.receive(sn.request_header)
 
     def test_expired_exception_reports_localtime(self):
         now = utc_now()
@@ -222,15 +256,14 @@ class TestSender(Base):
         sn = self.Sender(_timestamp=ts)  # force expiry
 
         exc = None
-        with mock.patch('mohawk.base.utc_now') as fake_now:
-            fake_now.return_value = now
+        with _patch_utc_now(now):
             try:
                 self.receive(sn.request_header)
             except:
                 etype, exc, tb = sys.exc_info()
 
-        eq_(type(exc), TokenExpired)
-        eq_(exc.localtime_in_seconds, now)
+        self.assertEqual(type(exc), TokenExpired)
+        self.assertEqual(exc.localtime_in_seconds, now)
 
     def test_localtime_offset(self):
         now = utc_now() - 120
@@ -244,108 +277,141 @@ class TestSender(Base):
         # Without an offset this will raise an expired exception.
         self.receive(sn.request_header, timestamp_skew_in_seconds=120)
 
-    @raises(MisComputedContentHash)
     def test_hash_tampering(self):
-        sn = self.Sender()
-        header = sn.request_header.replace('hash="', 'hash="nope')
-        self.receive(header)
+        header = self._baseline_header.replace('hash="', 'hash="nope')
+        with self.assertRaises(MisComputedContentHash):
+            self.receive(header)
 
-    @raises(MacMismatch)
     def test_bad_secret(self):
-        cfg = {
-            'id': 'my-hawk-id',
-            'key': 'INCORRECT; YOU FAIL',
-            'algorithm': 'sha256',
-        }
-        sn = self.Sender(credentials=cfg)
-        self.receive(sn.request_header)
+        sn = self.Sender(credentials=self._CRED_BAD_SECRET)
+        with self.assertRaises(MacMismatch):
+            self.receive(sn.request_header)
 
-    @raises(MacMismatch)
     def test_unexpected_algorithm(self):
-        cr = self.credentials.copy()
-        cr['algorithm'] = 'sha512'
-        sn = self.Sender(credentials=cr)
+        sn = self.Sender(credentials=self._CRED_SHA512)
 
         # Validate with mismatched credentials (sha256).
-        self.receive(sn.request_header)
+        with self.assertRaises(MacMismatch):
+            self.receive(sn.request_header)
 
-    @raises(InvalidCredentials)
     def test_invalid_credentials(self):
-        cfg = self.credentials.copy()
-        # Create an invalid credentials.
-        del cfg['algorithm']
-
-        self.Sender(credentials=cfg)
+        with self.assertRaises(InvalidCredentials):
+            self.Sender(credentials=self._CRED_NO_ALGO)
 
-    @raises(CredentialsLookupError)
     def test_unknown_id(self):
-        cr = self.credentials.copy()
-        cr['id'] = 'someone-else'
-        sn = self.Sender(credentials=cr)
+        sn = self.Sender(credentials=self._CRED_UNKNOWN_ID)
 
-        self.receive(sn.request_header)
+        with self.assertRaises(CredentialsLookupError):
+            self.receive(sn.request_header)
 
-    @raises(MacMismatch)
     def test_bad_ext(self):
         sn = self.Sender(ext='my external data')
 
         header = sn.request_header.replace('my external data', 'TAMPERED')
-        self.receive(header)
+        with self.assertRaises(MacMismatch):
+            self.receive(header)
 
     def test_ext_with_quotes(self):
         sn = self.Sender(ext='quotes=""')
         self.receive(sn.request_header)
         parsed = parse_authorization_header(sn.request_header)
-        eq_(parsed['ext'], 'quotes=""')
+        self.assertEqual(parsed['ext'], 'quotes=""')
 
     def test_ext_with_new_line(self):
         sn = self.Sender(ext="new line \n in the middle")
         self.receive(sn.request_header)
         parsed = parse_authorization_header(sn.request_header)
-        eq_(parsed['ext'], "new line \n in the middle")
+        self.assertEqual(parsed['ext'], "new line \n in the middle")
+
+    def test_ext_with_commas_and_equals(self):
+        ext = 'a=1, b="2,3"'
+        sn = self.Sender(ext=ext)
+        self.receive(sn.request_header)
+        parsed = parse_authorization_header(sn.request_header)
+        self.assertEqual(parsed['ext'], ext)
+
+    def test_unparseable_header(self):
+        with self.assertRaises(BadHeaderValue):
+            parse_authorization_header('Hawk id="abc", ts=123')
+
+    def test_unparseable_header_reports_position(self):
+        header = 'Hawk id="a",, ts="1"'
+        with self.assertRaises(BadHeaderValue) as cm:
+            parse_authorization_header(header)
+        self.assertIn('position {0}'.format(header.index(',,') + 1),
+                      str(cm.exception))
+
+    def test_header_without_attributes(self):
+        for header in ('Hawk ', 'Hawk'):
+            with self.assertRaises(BadHeaderValue):
+                parse_authorization_header(header)
 
-    @raises(BadHeaderValue)
     def test_ext_with_illegal_chars(self):
-        self.Sender(ext="something like \t is illegal")
+        with self.assertRaises(BadHeaderValue):
+            self.Sender(ext="something like \t is illegal")
 
-    @raises(BadHeaderValue)
     def test_ext_with_illegal_unicode(self):
-        self.Sender(ext=u'Ivan Kristi\u0107')
+        with self.assertRaises(BadHeaderValue):
+            self.Sender(ext=u'Ivan Kristi\u0107')
 
-    @raises(BadHeaderValue)
     def test_ext_with_illegal_utf8(self):
         # This isn't allowed because the escaped byte chars are out of
         # range. It's a little odd but this is what the Node lib does
         # implicitly with its regex.
-        self.Sender(ext=u'Ivan Kristi\u0107'.encode('utf8'))
+        with self.assertRaises(BadHeaderValue):
+            self.Sender(ext=u'Ivan Kristi\u0107'.encode('utf8'))
 
     def test_app_ok(self):
         app = 'custom-app'
         sn = self.Sender(app=app)
         self.receive(sn.request_header)
         parsed = parse_authorization_header(sn.request_header)
-        eq_(parsed['app'], app)
+        self.assertEqual(parsed['app'], app)
 
-    @raises(MacMismatch)
     def test_tampered_app(self):
         app = 'custom-app'
         sn = self.Sender(app=app)
         header = sn.request_header.replace(app, 'TAMPERED-WITH')
-        self.receive(header)
+        with self.assertRaises(MacMismatch):
+            self.receive(header)
 
     def test_dlg_ok(self):
         dlg = 'custom-dlg'
         sn = self.Sender(dlg=dlg)
         self.receive(sn.request_header)
         parsed = parse_authorization_header(sn.request_header)
-        eq_(parsed['dlg'], dlg)
+        self.assertEqual(parsed['dlg'], dlg)
 
-    @raises(MacMismatch)
     def test_tampered_dlg(self):
         dlg = 'custom-dlg'
         sn = self.Sender(dlg=dlg, app='some-app')
         header = sn.request_header.replace(dlg, 'TAMPERED-WITH')
-        self.receive(header)
+        with self.assertRaises(MacMismatch):
+            self.receive(header)
+
+
+@pytest.fixture(scope='module')
+def baseline_header():
+    return _baseline_request_header()
+
+
+@pytest.mark.parametrize('receive_kw', [
+    {'url': 'http://TAMPERED-WITH.com'},
+    {'method': 'POST'},
+    {'url': 'http://site.com/TAMPERED?bar=1'},
+    {'url': 'http://site.com/foo?bar=TAMPERED'},
+    {'url': 'https://site.com/foo?bar=1'},
+    {'url': 'http://site.com:8000/foo?bar=1'},
+    {'content': 'stuff=nope'},
+    {'content_type': 'application/json'},
+], ids=['host', 'method', 'path', 'query', 'scheme', 'port', 'content',
+        'content_type'])
+def test_tamper_with_request(baseline_header, receive_kw):
+    # Receiving the baseline header with anything changed must fail.
+    kw = dict(url=TestSender.url)
+    kw.update(receive_kw)
+    with pytest.raises(MacMismatch):
+        _receive(baseline_header, **kw)
 
 
 class TestReceiver(Base):
@@ -360,23 +426,18 @@ class TestReceiver(Base):
         url = kw.pop('url', self.url)
         sender = kw.pop('sender', None)
         sender_kw = kw.pop('sender_kw', {})
+        sender_kw.setdefault('nonce', 'n%d' % next(self._nonce_iter))
         sender_kw.setdefault('content', '')
         sender_kw.setdefault('content_type', '')
         sender_url = kw.pop('sender_url', url)
 
-        credentials_map = kw.pop('credentials_map',
-                                 lambda id: self.credentials)
-
         if sender:
             self.sender = sender
         else:
             self.sender = Sender(self.credentials, sender_url, method,
                                  **sender_kw)
 
-        kw.setdefault('content', '')
-        kw.setdefault('content_type', '')
-        self.receiver = Receiver(credentials_map,
-                                 self.sender.request_header, url, method,
+        self.receiver = _receive(self.sender.request_header, url, method,
                                  **kw)
 
     def respond(self, **kw):
@@ -392,10 +453,10 @@ class TestReceiver(Base):
 
         return receiver.response_header
 
-    @raises(InvalidCredentials)
     def test_invalid_credentials_lookup(self):
         # Return invalid credentials.
-        self.receive(credentials_map=lambda *a: {})
+        with self.assertRaises(InvalidCredentials):
+            self.receive(credentials_map=lambda *a: {})
 
     def test_get_ok(self):
         method = 'GET'
@@ -407,61 +468,21 @@ class TestReceiver(Base):
         self.receive(method=method)
         self.respond()
 
-    @raises(MacMismatch)
-    def test_respond_with_wrong_content(self):
-        self.receive()
-        self.respond(content='real content',
-                     accept_kw=dict(content='TAMPERED WITH'))
-
-    @raises(MacMismatch)
-    def test_respond_with_wrong_content_type(self):
-        self.receive()
-        self.respond(content_type='text/html',
-                     accept_kw=dict(content_type='application/json'))
-
-    @raises(MacMismatch)
-    def test_respond_with_wrong_url(self):
-        self.receive(url='http://fakesite.com')
-        wrong_receiver = self.receiver
-
-        self.receive(url='http://realsite.com')
-
-        self.respond(receiver=wrong_receiver)
-
-    @raises(MacMismatch)
-    def test_respond_with_wrong_method(self):
-        self.receive(method='GET')
-        wrong_receiver = self.receiver
-
-        self.receive(method='POST')
-
-        self.respond(receiver=wrong_receiver)
-
-    @raises(MacMismatch)
-    def test_respond_with_wrong_nonce(self):
-        self.receive(sender_kw=dict(nonce='another-nonce'))
-        wrong_receiver = self.receiver
-
-        self.receive()
-
-        # The nonce must match the one sent in the original request.
-        self.respond(receiver=wrong_receiver)
-
     def test_respond_with_unhashed_content(self):
         self.receive()
 
-        self.respond(always_hash_content=False, content=None,
-                     content_type=None,
-                     accept_kw=dict(accept_untrusted_content=True))
+        with _forbid_payload_hashing():
+            self.respond(always_hash_content=False, content=None,
+                         content_type=None,
+                         accept_kw=dict(accept_untrusted_content=True))
 
-    @raises(TokenExpired)
     def test_respond_with_expired_ts(self):
         self.receive()
         hdr = self.receiver.respond(content='', content_type='')
 
-        with mock.patch('mohawk.base.utc_now') as fn:
-            fn.return_value = 0  # force an expiry
-            self.sender.accept_response(hdr, content='', content_type='')
+        with _patch_utc_now(0):  # force an expiry
+            with self.assertRaises(TokenExpired):
+                self.sender.accept_response(hdr, content='', content_type='')
 
     def test_respond_with_bad_ts_skew_ok(self):
         now = utc_now() - 120
@@ -469,9 +490,7 @@ class TestReceiver(Base):
         self.receive()
         hdr = self.receiver.respond(content='', content_type='')
 
-        with mock.patch('mohawk.base.utc_now') as fn:
-            fn.return_value = now
-
+        with _patch_utc_now(now):
             # Without an offset this will raise an expired exception.
             self.sender.accept_response(hdr, content='', content_type='',
                                         timestamp_skew_in_seconds=120)
@@ -482,76 +501,92 @@ class TestReceiver(Base):
         ext = 'custom-ext'
         self.respond(ext=ext)
         header = parse_authorization_header(self.receiver.response_header)
-        eq_(header['ext'], ext)
-
-    @raises(MacMismatch)
-    def test_respond_with_wrong_app(self):
-        self.receive(sender_kw=dict(app='TAMPERED-WITH', dlg='delegation'))
-        self.receiver.respond(content='', content_type='')
-        wrong_receiver = self.receiver
-
-        self.receive(sender_kw=dict(app='real-app', dlg='delegation'))
-
-        self.sender.accept_response(wrong_receiver.response_header,
-                                    content='', content_type='')
-
-    @raises(MacMismatch)
-    def test_respond_with_wrong_dlg(self):
-        self.receive(sender_kw=dict(app='app', dlg='TAMPERED-WITH'))
-        self.receiver.respond(content='', content_type='')
-        wrong_receiver = self.receiver
-
-        self.receive(sender_kw=dict(app='app', dlg='real-dlg'))
-
-        self.sender.accept_response(wrong_receiver.response_header,
-                                    content='', content_type='')
+        self.assertEqual(header['ext'], ext)
 
-    @raises(MacMismatch)
     def test_receive_wrong_method(self):
         self.receive(method='GET')
         wrong_sender = self.sender
-        self.receive(method='POST', sender=wrong_sender)
+        with self.assertRaises(MacMismatch):
+            self.receive(method='POST', sender=wrong_sender)
 
-    @raises(MacMismatch)
     def test_receive_wrong_url(self):
         self.receive(url='http://fakesite.com/')
         wrong_sender = self.sender
-        self.receive(url='http://realsite.com/', sender=wrong_sender)
+        with self.assertRaises(MacMismatch):
+            self.receive(url='http://realsite.com/', sender=wrong_sender)
 
-    @raises(MacMismatch)
     def test_receive_wrong_content(self):
         self.receive(sender_kw=dict(content='real request'),
                      content='real request')
         wrong_sender = self.sender
-        self.receive(content='TAMPERED WITH', sender=wrong_sender)
+        with self.assertRaises(MacMismatch):
+            self.receive(content='TAMPERED WITH', sender=wrong_sender)
 
-    @raises(MacMismatch)
     def test_unexpected_unhashed_content(self):
-        self.receive(sender_kw=dict(content=None, content_type=None,
-                                    always_hash_content=False))
+        with self.assertRaises(MacMismatch):
+            self.receive(sender_kw=dict(content=None, content_type=None,
+                                        always_hash_content=False))
 
-    @raises(ValueError)
     def test_cannot_receive_empty_content_only(self):
         content_type = 'text/plain'
-        self.receive(sender_kw=dict(content='<content>',
-                                    content_type=content_type),
-                     content=None, content_type=content_type)
+        with self.assertRaises(ValueError):
+            self.receive(sender_kw=dict(content='<content>',
+                                        content_type=content_type),
+                         content=None, content_type=content_type)
 
-    @raises(ValueError)
     def test_cannot_receive_empty_content_type_only(self):
         content = '<content>'
-        self.receive(sender_kw=dict(content=content,
-                                    content_type='text/plain'),
-                     content=content, content_type=None)
+        with self.assertRaises(ValueError):
+            self.receive(sender_kw=dict(content=content,
+                                        content_type='text/plain'),
+                         content=content, content_type=None)
 
-    @raises(MacMismatch)
     def test_receive_wrong_content_type(self):
         self.receive(sender_kw=dict(content_type='text/html'),
                      content_type='text/html')
         wrong_sender = self.sender
 
-        self.receive(content_type='application/json',
-                     sender=wrong_sender)
+        with self.assertRaises(MacMismatch):
+            self.receive(content_type='application/json',
+                         sender=wrong_sender)
+
+
+@pytest.mark.parametrize('respond_kw,accept_kw', [
+    ({'content': 'real content'}, {'content': 'TAMPERED WITH'}),
+    ({'content_type': 'text/html'}, {'content_type': 'application/json'}),
+], ids=['content', 'content_type'])
+def test_respond_with_wrong_payload(respond_kw, accept_kw):
+    sender, receiver = _request()
+
+    kw = dict(content='', content_type='')
+    kw.update(respond_kw)
+    receiver.respond(**kw)
+
+    kw = dict(content='', content_type='')
+    kw.update(accept_kw)
+    with pytest.raises(MacMismatch):
+        sender.accept_response(receiver.response_header, **kw)
+
+
+@pytest.mark.parametrize('wrong_request_kw,request_kw', [
+    ({'url': 'http://fakesite.com'}, {'url': 'http://realsite.com'}),
+    ({'method': 'GET'}, {'method': 'POST'}),
+    # The nonce must match the one sent in the original request.
+    ({'nonce': 'another-nonce'}, {'nonce': 'real-nonce'}),
+    ({'app': 'TAMPERED-WITH', 'dlg': 'delegation'},
+     {'app': 'real-app', 'dlg': 'delegation'}),
+    ({'app': 'app', 'dlg': 'TAMPERED-WITH'},
+     {'app': 'app', 'dlg': 'real-dlg'}),
+], ids=['url', 'method', 'nonce', 'app', 'dlg'])
+def test_respond_with_wrong_request(wrong_request_kw, request_kw):
+    # A response to one request must not be accepted for another.
+    wrong_sender, wrong_receiver = _request(**wrong_request_kw)
+    wrong_receiver.respond(content='', content_type='')
+
+    sender, receiver = _request(**request_kw)
+    with pytest.raises(MacMismatch):
+        sender.accept_response(wrong_receiver.response_header,
+                               content='', content_type='')
 
 
 class TestSendAndReceive(Base):
@@ -1,5 +1,9 @@
 from base64 import b64encode, urlsafe_b64encode
-import calendar
+try:
+    from collections import OrderedDict
+except ImportError:
+    # Python 2.6
+    OrderedDict = None
 import hashlib
 import hmac
 import logging
@@ -18,8 +22,21 @@ from .exc import BadHeaderValue, HawkFail, InvalidCredentials
 HAWK_VER = 1
 log = logging.getLogger(__name__)
 
+_payload_hash_prefix = ('hawk.' + str(HAWK_VER) + '.payload\n').encode('ascii')
+
+# Available in Python 2.7.7 and 3.3 or later.
+_compare_digest = getattr(hmac, 'compare_digest', None)
+
+# Pre-keyed (inner, outer) HMAC digests by (algorithm, key), least
+# recently used first when OrderedDict is available.
+_hmac_key_state_cache = OrderedDict() if OrderedDict else {}
+_hmac_key_state_cache_size = 256
+
 
 def validate_credentials(creds):
+    # This is not memoized by identity. Credentials are mutable dicts that
+    # callers may change between requests and the check is only three
+    # lookups, which is cheaper than any cache would be.
     if not isinstance(creds, dict):
         raise InvalidCredentials('credentials must be a dict')
     try:
@@ -41,23 +58,27 @@ def random_string(length):
 
 def calculate_payload_hash(payload, algorithm, content_type):
     """Calculates a hash for a given payload."""
-    p_hash = hashlib.new(algorithm)
+    content_type = parse_content_type(content_type)
+    payload = payload or ''
 
-    parts = []
-    parts.append('hawk.' + str(HAWK_VER) + '.payload\n')
-    parts.append(parse_content_type(content_type) + '\n')
-    parts.append(payload or '')
-    parts.append('\n')
+    # Make sure we are about to hash binary strings.
+    if not isinstance(content_type, six.binary_type):
+        content_type = content_type.encode('utf8')
+    if not isinstance(payload, six.binary_type):
+        payload = payload.encode('utf8')
 
-    for i, p in enumerate(parts):
-        # Make sure we are about to hash binary strings.
-        if not isinstance(p, six.binary_type):
-            p = p.encode('utf8')
-        p_hash.update(p)
-        parts[i] = p
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug('calculating payload hash from content_type={typ} '
+                  'payload={payload}'
+                  .format(typ=repr(content_type), payload=repr(payload)))
 
-    log.debug('calculating payload hash from:\n{parts}'
-              .format(parts=pprint.pformat(parts)))
+    # Feed each part to the hash rather than concatenating them first.
+    p_hash = hashlib.new(algorithm)
+    p_hash.update(_payload_hash_prefix)
+    p_hash.update(content_type)
+    p_hash.update(b'\n')
+    p_hash.update(payload)
+    p_hash.update(b'\n')
 
     return b64encode(p_hash.digest())
 
@@ -65,26 +86,73 @@ def calculate_payload_hash(payload, algorithm, content_type):
 def calculate_mac(mac_type, resource, content_hash):
     """Calculates a message authorization code (MAC)."""
     normalized = normalize_string(mac_type, resource, content_hash)
-    log.debug(u'normalized resource for mac calc: {norm}'
-              .format(norm=normalized))
-    digestmod = getattr(hashlib, resource.credentials['algorithm'])
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(u'normalized resource for mac calc: {norm}'
+                  .format(norm=normalized.decode('utf8')))
+    algorithm = resource.credentials['algorithm']  # e.g. 'sha256'
+    key = resource.credentials['key']
+    return b64encode(hmac_digest(key, normalized, algorithm))
 
-    # Make sure we are about to hash binary strings.
 
-    if not isinstance(normalized, six.binary_type):
-        normalized = normalized.encode('utf8')
-    key = resource.credentials['key']  # e.g. 'sha256'
-    if not isinstance(key, six.binary_type):
-        key = key.encode('ascii')
+def hmac_digest(key, msg, algorithm):
+    """
+    Returns the HMAC of msg using the named hashlib algorithm.
+
+    The key may be a text or byte string.
+    """
+    inner, outer = _hmac_key_states(key, algorithm)
+    inner = inner.copy()
+    inner.update(msg)
+    outer = outer.copy()
+    outer.update(inner.digest())
+    return outer.digest()
+
+
+def _hmac_key_states(key, algorithm):
+    # Every HMAC starts by hashing the padded key into an inner and an outer
+    # digest. The same credentials sign many messages so we keep those
+    # states around and copy them, which is far cheaper than re-hashing.
+    # This also shares them between request and response MACs.
+    cache_key = (algorithm, key)
+    # Re-inserting on every use keeps the most recently used keys last.
+    states = _hmac_key_state_cache.pop(cache_key, None)
+    if states is None:
+        # Make sure we are about to hash binary strings.
+        if not isinstance(key, six.binary_type):
+            key = key.encode('ascii')
 
-    result = hmac.new(key, normalized, digestmod)
-    return b64encode(result.digest())
+        digestmod = getattr(hashlib, algorithm)
+        inner = digestmod()
+        outer = digestmod()
+        if len(key) > inner.block_size:
+            key = digestmod(key).digest()
+        key = key.ljust(inner.block_size, b'\0')
+        inner.update(key.translate(hmac.trans_36))
+        outer.update(key.translate(hmac.trans_5C))
+
+        states = (inner, outer)
+
+        if len(_hmac_key_state_cache) >= _hmac_key_state_cache_size:
+            # Don't let an unbounded number of keys pile up in memory.
+            # Without OrderedDict this evicts an arbitrary key instead.
+            if OrderedDict:
+                _hmac_key_state_cache.popitem(last=False)
+            else:
+                _hmac_key_state_cache.popitem()
+
+    _hmac_key_state_cache[cache_key] = states
+    return states
 
 
 def normalize_string(mac_type, resource, content_hash):
-    """Serializes mac_type and resource into a HAWK string."""
+    """
+    Serializes mac_type and resource into a HAWK string.
 
-    normalized = [
+    This returns UTF-8 encoded bytes, ready to be MAC'd. It used to return
+    a text string.
+    """
+
+    parts = [
         'hawk.' + str(HAWK_VER) + '.' + mac_type,
         normalize_header_attr(resource.timestamp),
         normalize_header_attr(resource.nonce),
@@ -97,18 +165,20 @@ def normalize_string(mac_type, resource, content_hash):
 
     # The blank lines are important. They follow what the Node Hawk lib does.
 
-    normalized.append(normalize_header_attr(resource.ext or ''))
+    parts.append(normalize_header_attr(resource.ext or ''))
 
     if resource.app:
-        normalized.append(normalize_header_attr(resource.app))
-        normalized.append(normalize_header_attr(resource.dlg or ''))
+        parts.append(normalize_header_attr(resource.app))
+        parts.append(normalize_header_attr(resource.dlg or ''))
 
-    # Add trailing new line.
-    normalized.append('')
-
-    normalized = '\n'.join(normalized)
+    # Encode straight into one buffer. Every part, including the last,
+    # is followed by a new line.
+    normalized = bytearray()
+    for part in parts:
+        normalized += part.encode('utf8')
+        normalized += b'\n'
 
-    return normalized
+    return bytes(normalized)
 
 
 def parse_content_type(content_type):
@@ -119,6 +189,16 @@ def parse_content_type(content_type):
         return ''
 
 
+_allowable_header_keys = frozenset(['id', 'ts', 'nonce', 'hash',
+                                   'ext', 'mac', 'app', 'dlg'])
+
+# Matches key="value" where the value may contain backslash-escaped quotes,
+# followed by a comma or the end of the header.
+_header_attr_pair = re.compile(
+    r'\s*(?P<key>\w+)="(?P<value>(?:[^"\\]|\\.)*)"\s*(?:,|\Z)',
+    re.DOTALL)
+
+
 def parse_authorization_header(auth_header):
     """
     Example Authorization header:
@@ -126,55 +206,58 @@ def parse_authorization_header(auth_header):
         'Hawk id="dh37fgj492je", ts="1367076201", nonce="NPHgnG", ext="and
         welcome!", mac="CeWHy4d9kbLGhDlkyw2Nh3PJ7SDOdZDa267KH4ZaNMY="'
     """
-    allowable_keys = ['id', 'ts', 'nonce', 'hash',
-                      'ext', 'mac', 'app', 'dlg']
-
     attributes = {}
 
     # Make sure we have a unicode object for consistency.
     if isinstance(auth_header, six.binary_type):
         auth_header = auth_header.decode('utf8')
 
-    parts = auth_header.split(',')
-    auth_scheme_parts = parts[0].split(' ')
-    if not 'hawk' == auth_scheme_parts[0].lower():
-        raise HawkFail("Unknown scheme: " + auth_scheme_parts[0].lower())
-
-    # Replace 'Hawk key: value' with 'key: value'
-    # which matches the rest of parts
-    parts[0] = auth_scheme_parts[1]
-
-    for part in parts:
-        attr_parts = part.split('=')
-        key = attr_parts[0].strip()
-        if key not in allowable_keys:
-            raise HawkFail("Unknown Hawk key_" + attr_parts[0] + "_")
-
-        # TODO we don't do a good job of parsing, '=' should work for more =.
-        # hash or mac value includes '=' character... fixup
-        if len(attr_parts) == 3:
-            attr_parts[1] += '=' + attr_parts[2]
-
-        # Chop of quotation marks
-        value = attr_parts[1]
-
-        if attr_parts[1].find('"') == 0:
-            value = attr_parts[1][1:]
-
-        if value.find('"') > -1:
-            value = value[0:-1]
+    scheme, _, attrs = auth_header.partition(' ')
+    if not 'hawk' == scheme.lower():
+        raise HawkFail("Unknown scheme: " + scheme.lower())
+
+    if not attrs.strip():
+        raise BadHeaderValue('Hawk header {header} has no attributes'
+                             .format(header=repr(auth_header)))
+
+    # Scan key="value" pairs left to right. Each match starts exactly where
+    # the last one ended so the whole header is consumed in one pass.
+    pos = 0
+    while pos < len(attrs):
+        match = _header_attr_pair.match(attrs, pos)
+        if not match:
+            # Report the position within the whole header, scheme included.
+            raise BadHeaderValue('Could not parse Hawk header {header} '
+                                 'at position {pos}'
+                                 .format(header=repr(auth_header),
+                                         pos=pos + len(scheme) + 1))
+        pos = match.end()
+
+        key, value = match.group('key', 'value')
+        if key not in _allowable_header_keys:
+            raise HawkFail("Unknown Hawk key_" + key + "_")
 
         validate_header_attr(value, name=key)
         value = unescape_header_attr(value)
         attributes[key] = value
 
-    log.debug('parsed Hawk header: {header} into: \n{parsed}'
-              .format(header=auth_header, parsed=pprint.pformat(attributes)))
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug('parsed Hawk header: {header} into: \n{parsed}'
+                  .format(header=auth_header,
+                          parsed=pprint.pformat(attributes)))
     return attributes
 
 
 def strings_match(a, b):
     # Constant time string comparision, mitigates side channel attacks.
+    if _compare_digest is not None:
+        # This needs both arguments to be the same type.
+        if not isinstance(a, six.binary_type):
+            a = a.encode('utf8')
+        if not isinstance(b, six.binary_type):
+            b = b.encode('utf8')
+        return _compare_digest(a, b)
+
     if len(a) != len(b):
         return False
     result = 0
@@ -195,8 +278,8 @@ def strings_match(a, b):
 
 def utc_now(offset_in_seconds=0.0):
     # TODO: add support for SNTP server? See ntplib module.
-    return int(math.floor(calendar.timegm(time.gmtime()) +
-                          float(offset_in_seconds)))
+    # time.time() is already seconds since the epoch in UTC.
+    return int(math.floor(time.time() + float(offset_in_seconds)))
 
 
 # Allowed value characters: